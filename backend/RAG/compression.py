@@ -0,0 +1,266 @@
+import json
+import shutil
+import argparse
+from pathlib import Path
+import numpy as np
+
+# Compression defaults
+TARGET_DIMENSION = 256
+INDEX_TYPES = ["AUTOINDEX", "IVF_SQ8", "IVF_PQ"]
+PQ_SUBSPACES = 32
+PQ_BITS = 8
+IVF_NLIST = 1024
+IVF_NPROBE = 16
+RERANK_CANDIDATES = 50
+
+# Query-side artifacts of compressed builds (projection + full-vector re-score store), one folder per collection
+ARTIFACTS_DIR = Path(__file__).resolve().parent / "indexes"
+
+# Queries used to measure recall lost to compression
+EVAL_QUERIES = [
+    "Help me find an unlimited data plan for my iPhone for as low as possible",
+    "Tell me about Latino TV Package",
+    "What internet speed do I need for gaming and streaming?",
+    "Can I bring my own phone to Xfinity Mobile?",
+    "Which sports channels are in the Sports & News TV package?",
+    "How much does home security monitoring cost?",
+    "Does Xfinity home phone include international calling?",
+    "What equipment do I get with Xfinity internet?",
+    "Is there an internet plan for low income households?",
+    "How do I keep my wifi working during a power outage?",
+]
+
+
+def normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def ivf_nlist(rows):
+    """IVF cluster count for `rows` vectors, small enough that every cluster gets trained."""
+    return max(1, min(IVF_NLIST, rows // 39, int(4 * np.sqrt(rows))))
+
+
+def pq_subspaces(dimension, subspaces=PQ_SUBSPACES):
+    """Largest subspace count up to `subspaces` that divides the dimension, as Milvus IVF_PQ requires."""
+    return max(m for m in range(1, min(subspaces, dimension) + 1) if dimension % m == 0)
+
+
+class PCAProjector:
+    """Learned PCA projection, plain truncation when `learned` is False, or identity when `dimension` is None."""
+
+    def __init__(self, dimension=TARGET_DIMENSION, learned=True):
+        self.dimension = dimension
+        self.learned = learned and dimension is not None
+        self.mean = None
+        self.components = None
+
+    def fit(self, vectors):
+        if self.learned:
+            self.mean = vectors.mean(axis=0)
+            _, _, vt = np.linalg.svd(vectors - self.mean, full_matrices=False)
+            # Never ask for more components than the sample supports
+            self.components = vt[:min(self.dimension, vt.shape[0])]
+        return self
+
+    def transform(self, vectors):
+        if self.learned:
+            return normalize((vectors - self.mean) @ self.components.T)
+        return normalize(vectors[:, :self.dimension])
+
+    def output_dimension(self, input_dimension):
+        if self.learned:
+            return self.components.shape[0]
+        return min(self.dimension or input_dimension, input_dimension)
+
+    def nbytes(self):
+        if not self.learned:
+            return 0
+        return self.mean.nbytes + self.components.nbytes
+
+
+class CompressedIndex:
+    """Query side of a compressed collection: projects queries and re-scores the ANN shortlist on full vectors.
+
+    Milvus holds the reduced vectors under an IVF_SQ8/IVF_PQ (or AUTOINDEX)
+    index and scores the full-precision query against the quantized codes;
+    the full vectors stay on disk, memory-mapped, with row i holding id i.
+    """
+
+    def __init__(self, projector, full_vectors, meta):
+        self.projector = projector
+        self.full_vectors = full_vectors
+        self.index_type = meta["index_type"]
+        self.dimension = meta["dimension"]
+        self.nlist = meta["nlist"]
+        self.pq_subspaces = meta["pq_subspaces"]
+        self.candidates = meta["candidates"]
+
+    def project(self, query_vectors):
+        return self.projector.transform(normalize(np.asarray(query_vectors, dtype=np.float32))).tolist()
+
+    def fetch_limit(self, limit):
+        return max(limit, self.candidates)
+
+    def search_params(self):
+        if self.index_type.startswith("IVF"):
+            return {"params": {"nprobe": min(IVF_NPROBE, self.nlist)}}
+        return None
+
+    def full_vector(self, row_id):
+        return np.asarray(self.full_vectors[row_id], dtype=np.float32)
+
+    def rescore(self, query_vector, hits, limit):
+        """Re-orders the hits (dicts with an "id") by exact cosine on the full vectors and keeps `limit`."""
+        if not hits:
+            return []
+        query = normalize(np.asarray([query_vector], dtype=np.float32))[0]
+        exact = np.asarray(self.full_vectors[np.asarray([hit["id"] for hit in hits])], dtype=np.float32) @ query
+        return [hits[i] for i in np.argsort(-exact)[:limit]]
+
+    def index_nbytes(self, rows):
+        """Estimated resident bytes of the Milvus vector index for `rows` vectors."""
+        centroids = self.nlist * self.dimension * 4 if self.index_type.startswith("IVF") else 0
+        if self.index_type == "IVF_SQ8":
+            return rows * self.dimension + centroids
+        if self.index_type == "IVF_PQ":
+            return rows * self.pq_subspaces * PQ_BITS // 8 + centroids + 2 ** PQ_BITS * self.dimension * 4
+        # AUTOINDEX (HNSW) keeps fp32 vectors; graph links are not counted
+        return rows * self.dimension * 4
+
+
+def save_index(name, vectors, projector, index_type, candidates=RERANK_CANDIDATES, artifacts_dir=ARTIFACTS_DIR):
+    """Writes the query-side artifacts of a compressed build and returns the CompressedIndex for it.
+
+    `vectors` must be in primary-key order (row i is id i).
+    """
+    path = Path(artifacts_dir) / name
+    path.mkdir(parents=True, exist_ok=True)
+    np.save(path / "full_vectors.npy", normalize(np.asarray(vectors, dtype=np.float32)))
+    if projector.learned:
+        np.savez(path / "projection.npz", mean=projector.mean, components=projector.components)
+
+    dimension = projector.output_dimension(vectors.shape[1])
+    meta = {
+        "index_type": index_type,
+        "dimension": dimension,
+        "projection": "pca" if projector.learned else "truncate",
+        "nlist": ivf_nlist(len(vectors)),
+        "pq_subspaces": pq_subspaces(dimension),
+        "candidates": candidates,
+    }
+    # meta.json is written last, so a folder without it is an incomplete build
+    with open(path / "meta.json", "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=4)
+    return load_index(name, artifacts_dir)
+
+
+def load_index(name, artifacts_dir=ARTIFACTS_DIR):
+    """Loads a collection's CompressedIndex, or returns None if the collection isn't compressed."""
+    path = Path(artifacts_dir) / name
+    if not (path / "meta.json").exists():
+        return None
+    with open(path / "meta.json", "r", encoding="utf-8") as f:
+        meta = json.load(f)
+
+    projector = PCAProjector(meta["dimension"], learned=meta["projection"] == "pca")
+    if projector.learned:
+        projection = np.load(path / "projection.npz")
+        projector.mean, projector.components = projection["mean"], projection["components"]
+    full_vectors = np.load(path / "full_vectors.npy", mmap_mode="r")
+    return CompressedIndex(projector, full_vectors, meta)
+
+
+def remove_index(name, artifacts_dir=ARTIFACTS_DIR):
+    shutil.rmtree(Path(artifacts_dir) / name, ignore_errors=True)
+
+
+def compression_report(client, collection_name, index, query_vectors, limit=6, candidates=None):
+    """Measures memory saved and recall@limit lost by a deployed compressed collection.
+
+    Queries go through the same projection, Milvus search and full-vector
+    re-scoring as milvus_search; exact cosine search over the full vectors is
+    the baseline. Recall is reported for the ANN ranking alone and re-scored.
+    """
+    candidates = index.candidates if candidates is None else candidates
+    full_vectors = index.full_vectors
+    rows, full_dimension = full_vectors.shape
+    if candidates >= rows:
+        print(f"Warning: a shortlist of {candidates} covers all {rows} vectors, so re-scored recall is trivially exact.")
+
+    ann_hits = 0
+    rescored_hits = 0
+    total = 0
+    for query in query_vectors:
+        query = normalize(np.asarray([query], dtype=np.float32))[0]
+        expected = {int(i) for i in np.argsort(-(np.asarray(full_vectors) @ query))[:limit]}
+        res = client.search(collection_name=collection_name, data=index.project([query]),
+                            limit=max(limit, candidates), search_params=index.search_params(), output_fields=[])
+        hits = [{"id": hit.get("id")} for hit in res[0]] if res else []
+        ann_hits += len(expected & {hit["id"] for hit in hits[:limit]})
+        rescored_hits += len(expected & {hit["id"] for hit in index.rescore(query, hits, limit)})
+        total += len(expected)
+
+    full_bytes = rows * full_dimension * 4
+    index_bytes = index.index_nbytes(rows)
+    projection_bytes = index.projector.nbytes()
+    recall = rescored_hits / total if total else 1.0
+    return {
+        "collection": collection_name,
+        "index_type": index.index_type,
+        "dimension": index.dimension,
+        "vectors": rows,
+        "candidates": candidates,
+        "full_bytes": full_bytes,
+        "index_bytes": index_bytes,
+        "projection_bytes": projection_bytes,
+        "memory_saved": 1 - index_bytes / full_bytes if full_bytes else 0.0,
+        "memory_saved_with_projection": 1 - (index_bytes + projection_bytes) / full_bytes if full_bytes else 0.0,
+        "ann_recall": ann_hits / total if total else 1.0,
+        "recall": recall,
+        "recall_lost": 1 - recall,
+    }
+
+
+def print_compression_report(report):
+    """Prints the memory-vs-recall trade-off of a deployed compressed collection."""
+    print(f"Collection:            {report['collection']} ({report['index_type']}, {report['dimension']} dims)")
+    print(f"Vectors:               {report['vectors']}")
+    print(f"Full fp32 index:       {report['full_bytes']} bytes")
+    print(f"Compressed index:      {report['index_bytes']} bytes (estimated)")
+    print(f"Query projection:      {report['projection_bytes']} bytes (search process, fixed size)")
+    print(f"Re-score store:        memory-mapped from disk")
+    print(f"Memory saved:          {report['memory_saved'] * 100:.1f}% "
+          f"({report['memory_saved_with_projection'] * 100:.1f}% counting the projection)")
+    print(f"Recall@k (ANN only):   {report['ann_recall'] * 100:.1f}%")
+    print(f"Recall@k (re-scored):  {report['recall'] * 100:.1f}% (shortlist of {report['candidates']})")
+    print(f"Recall lost:           {report['recall_lost'] * 100:.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report memory saved vs recall lost by the live compressed index.")
+    parser.add_argument("--collection", default="Xfinity_VDB", help="Alias or versioned collection to evaluate.")
+    parser.add_argument("--limit", type=int, default=6)
+    parser.add_argument("--candidates", type=int, help="Shortlist size to evaluate (default: the one it was built with).")
+    args = parser.parse_args()
+
+    from pymilvus import MilvusClient
+    from milvus_init import MILVUS_URI
+    from embedding import create_embeddings
+
+    client = MilvusClient(uri=MILVUS_URI)
+    try:
+        collection_name = client.describe_alias(alias=args.collection).get("collection_name")
+    except Exception:
+        collection_name = args.collection
+    index = load_index(collection_name)
+    if index is None:
+        print(f"'{collection_name}' was built without compression; rebuild with index_builder.py --index-type/--dimension.")
+        return
+
+    query_vectors = create_embeddings(EVAL_QUERIES)
+    print_compression_report(compression_report(client, collection_name, index, query_vectors, args.limit, args.candidates))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import re
+import zlib
+import random
+from collections import defaultdict
+
+# MinHash / LSH settings
+NUM_PERM = 128
+NUM_BANDS = 32  # 32 bands x 4 rows -> candidate threshold ~(1/32)^(1/4) = 0.42 Jaccard
+SHINGLE_SIZE = 5
+JACCARD_THRESHOLD = 0.8
+
+# Repeated-block stripping settings
+MIN_BLOCK_CHARS = 30
+MIN_BLOCK_DOCS = 3
+MIN_BLOCK_DOC_FRACTION = 0.15
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def split_blocks(text):
+    """Splits text into paragraph blocks separated by blank lines."""
+    return [block.strip() for block in re.split(r"\n\s*\n", text) if block.strip()]
+
+
+def _normalize_block(block):
+    return re.sub(r"\s+", " ", block).strip().lower()
+
+
+def find_repeated_blocks(texts, min_chars=MIN_BLOCK_CHARS, min_docs=MIN_BLOCK_DOCS,
+                         min_doc_fraction=MIN_BLOCK_DOC_FRACTION):
+    """Returns normalized blocks (nav, footer, legal) that appear in too many documents."""
+    doc_freq = defaultdict(int)
+    for text in texts:
+        for block in {_normalize_block(b) for b in split_blocks(text)}:
+            if len(block) >= min_chars:
+                doc_freq[block] += 1
+
+    cutoff = max(min_docs, int(min_doc_fraction * len(texts)))
+    return {block for block, count in doc_freq.items() if count >= cutoff}
+
+
+def strip_blocks(text, repeated_blocks):
+    """Removes repeated blocks from a text, keeping the remaining paragraphs in order."""
+    kept = [b for b in split_blocks(text) if _normalize_block(b) not in repeated_blocks]
+    return "\n\n".join(kept)
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """Builds the set of word n-gram shingles for a text."""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _permutations(num_perm, seed=1):
+    rng = random.Random(seed)
+    return [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME)) for _ in range(num_perm)]
+
+
+def minhash_signature(shingle_set, permutations):
+    """Computes the MinHash signature of a shingle set."""
+    if not shingle_set:
+        return [_MAX_HASH] * len(permutations)
+    hashes = [zlib.crc32(s.encode("utf-8")) for s in shingle_set]
+    return [min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes) for a, b in permutations]
+
+
+def estimate_jaccard(sig_a, sig_b):
+    """Estimates Jaccard similarity from two MinHash signatures."""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+def find_near_duplicates(texts, threshold=JACCARD_THRESHOLD, num_perm=NUM_PERM, num_bands=NUM_BANDS):
+    """Returns the indices of texts that near-duplicate an earlier text (first occurrence wins)."""
+    permutations = _permutations(num_perm)
+    signatures = [minhash_signature(shingles(text), permutations) for text in texts]
+    rows = num_perm // num_bands
+
+    buckets = defaultdict(list)
+    duplicates = set()
+    for idx, sig in enumerate(signatures):
+        candidates = set()
+        for band in range(num_bands):
+            key = (band, tuple(sig[band * rows:(band + 1) * rows]))
+            candidates.update(buckets[key])
+            buckets[key].append(idx)
+
+        for other in sorted(candidates):
+            if other not in duplicates and estimate_jaccard(sig, signatures[other]) >= threshold:
+                duplicates.add(idx)
+                break
+
+    return duplicates
+
+
+def clean_corpus(corpus):
+    """Strips repeated blocks and drops near-duplicate chunks across categories.
+
+    `corpus` maps category name to a (chunks, urls) tuple. Returns the cleaned
+    corpus in the same shape plus a per-category report of what was removed.
+    """
+    flat = [(category, chunk, url) for category, (chunks, urls) in corpus.items()
+            for chunk, url in zip(chunks, urls)]
+
+    repeated_blocks = find_repeated_blocks([chunk for _, chunk, _ in flat])
+    stripped = [(category, strip_blocks(chunk, repeated_blocks), chunk, url) for category, chunk, url in flat]
+    duplicates = find_near_duplicates([text for _, text, _, _ in stripped])
+
+    report = {category: {"chunks_in": len(chunks), "chunks_removed": 0, "bytes_in": 0, "bytes_removed": 0}
+              for category, (chunks, _) in corpus.items()}
+    cleaned = {category: ([], []) for category in corpus}
+
+    for idx, (category, text, original, url) in enumerate(stripped):
+        original_bytes = len(original.encode("utf-8"))
+        stats = report[category]
+        stats["bytes_in"] += original_bytes
+
+        if idx in duplicates or not text:
+            stats["chunks_removed"] += 1
+            stats["bytes_removed"] += original_bytes
+            continue
+
+        stats["bytes_removed"] += original_bytes - len(text.encode("utf-8"))
+        cleaned[category][0].append(text)
+        cleaned[category][1].append(url)
+
+    return cleaned, report
+
+
+def print_report(report):
+    """Prints how many chunks and bytes were removed per category."""
+    print(f"{'category':<16}{'chunks':>10}{'removed':>10}{'bytes':>12}{'removed':>12}{'saved':>8}")
+    for category, stats in report.items():
+        saved = stats["bytes_removed"] / stats["bytes_in"] * 100 if stats["bytes_in"] else 0.0
+        print(f"{category:<16}{stats['chunks_in']:>10}{stats['chunks_removed']:>10}"
+              f"{stats['bytes_in']:>12}{stats['bytes_removed']:>12}{saved:>7.1f}%")
@@ -3,6 +3,7 @@ import json
 import numpy as np
 from transformers import AutoTokenizer, AutoModel
 import torch
+from dedup import clean_corpus, print_report
 
 
 def extract_text_from_file(file_path):
@@ -60,32 +61,41 @@ def save_to_json(embeddings, chunks, urls, output_file):
     print(f"Saved: {output_file}")
 
 
-def process_directories(directory_paths, output_folder):
+def process_directories(directory_paths, output_folder, dedup=True):
     """Process multiple directories and save separate JSON files for each."""
     if not os.path.exists(output_folder):
         os.makedirs(output_folder)
 
+    corpus = {}
     for directory_path in directory_paths:
         dir_name = os.path.basename(directory_path.rstrip('/'))
+        corpus[dir_name] = chunk_files_in_directory(directory_path)
+
+    # Strip shared nav/footer/legal blocks and near-duplicate pages before embedding
+    if dedup:
+        corpus, report = clean_corpus(corpus)
+        print_report(report)
+
+    for dir_name, (chunks, urls) in corpus.items():
         output_file = os.path.join(output_folder, f"{dir_name}.json")
 
-        chunks, urls = chunk_files_in_directory(directory_path)
         if chunks:
             embeddings = create_embeddings(chunks)
             save_to_json(embeddings, chunks, urls, output_file)
         else:
-            print(f"No text files found in {directory_path}, skipping.")
-
-
-# Example Usage
-directories = [
-    "../text_data/tvdata",
-    "../text_data/internet",
-    "../text_data/mobile",
-    "../text_data/home_solution",
-    "../text_data/home_phone",
-    "../text_data/misc"
-]
-
-output_folder = "./processed"
-process_directories(directories, output_folder)
+            print(f"No text files found for {dir_name}, skipping.")
+
+
+if __name__ == "__main__":
+    # Example Usage
+    directories = [
+        "../text_data/tvdata",
+        "../text_data/internet",
+        "../text_data/mobile",
+        "../text_data/home_solution",
+        "../text_data/home_phone",
+        "../text_data/misc"
+    ]
+
+    output_folder = "./processed"
+    process_directories(directories, output_folder)
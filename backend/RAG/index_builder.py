@@ -0,0 +1,281 @@
+import os
+import re
+import json
+import logging
+import argparse
+import numpy as np
+from pymilvus import MilvusClient, DataType
+from pymilvus.exceptions import MilvusException
+
+from milvus_init import MILVUS_URI, COLLECTIONS_CONFIG
+from compression import INDEX_TYPES, PQ_BITS, RERANK_CANDIDATES, PCAProjector, normalize, save_index, remove_index
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# milvus_search queries this alias; it always points at the live versioned collection
+ALIAS = "Xfinity_VDB"
+VERSION_PREFIX = f"{ALIAS}_v"
+KEEP_VERSIONS = 2
+INSERT_BATCH_SIZE = 1000
+
+# Processed JSON file name -> partition
+PARTITIONS = {
+    "tvdata": "TV_data",
+    "internet": "Internet_data",
+    "mobile": "Mobile_data",
+    "home_solution": "Home_Solution_data",
+    "home_phone": "Home_Phone_data",
+    "misc": "Misc_data"
+}
+
+
+def load_json(file_path):
+    """Load data from a JSON file."""
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        logger.error(f"Error loading JSON file {file_path}: {e}")
+        return []
+
+
+def version_name(version):
+    return f"{VERSION_PREFIX}{version}"
+
+
+def list_versions(client):
+    """Returns the version numbers of all Xfinity_VDB_v{n} collections, oldest first."""
+    pattern = re.compile(rf"^{re.escape(VERSION_PREFIX)}(\d+)$")
+    matches = (pattern.match(name) for name in client.list_collections())
+    return sorted(int(m.group(1)) for m in matches if m)
+
+
+def live_collection(client):
+    """Returns the collection the alias currently points at, or None if the alias doesn't exist."""
+    try:
+        return client.describe_alias(alias=ALIAS).get("collection_name")
+    except MilvusException:
+        return None
+
+
+def create_empty_collection(client, name, dimension, metric_type):
+    """Creates a collection with the same layout as the quick-setup one, but without an index yet."""
+    schema = MilvusClient.create_schema(auto_id=False, enable_dynamic_field=True)
+    schema.add_field(field_name="id", datatype=DataType.INT64, is_primary=True)
+    schema.add_field(field_name="vector", datatype=DataType.FLOAT_VECTOR, dim=dimension)
+    client.create_collection(collection_name=name, schema=schema)
+    logger.info(f"Collection '{name}' created (dimension {dimension}, {metric_type}).")
+
+
+def load_records(json_directory):
+    """Reads every processed JSON file; returns [(partition, rows)] with ids unique across files."""
+    batches = []
+    total = 0
+    for file_name in sorted(os.listdir(json_directory)):
+        if not file_name.endswith(".json"):
+            continue
+        partition_name = PARTITIONS.get(file_name.replace(".json", "").lower())
+        if not partition_name:
+            logger.warning(f"No matching partition for file '{file_name}', skipping.")
+            continue
+
+        records = load_json(os.path.join(json_directory, file_name))
+        if not records:
+            continue
+
+        # Ids restart at 0 in every processed file, so offset them to keep primary keys unique
+        rows = [dict(record, id=total + idx) for idx, record in enumerate(records)]
+        batches.append((partition_name, rows))
+        total += len(rows)
+    return batches
+
+
+def compress_records(name, batches, index_type, dimension, learned, candidates):
+    """Fits the projection, saves the query-side artifacts and replaces each row's vector with its reduced one."""
+    rows = [row for _, partition_rows in batches for row in partition_rows]  # id order
+    vectors = normalize(np.asarray([row["vector"] for row in rows], dtype=np.float32))
+    projector = PCAProjector(dimension, learned=learned).fit(vectors)
+    for row, vector in zip(rows, projector.transform(vectors)):
+        row["vector"] = vector.tolist()
+    index = save_index(name, vectors, projector, index_type, candidates)
+    logger.info(f"Compressed {len(rows)} vectors to {index.dimension} dims for {index_type}.")
+    return index
+
+
+def bulk_load(client, name, batches):
+    """Inserts each partition's rows; returns (rows inserted, a probe record)."""
+    total = 0
+    probe = None
+    for partition_name, rows in batches:
+        client.create_partition(collection_name=name, partition_name=partition_name)
+        for start in range(0, len(rows), INSERT_BATCH_SIZE):
+            client.insert(collection_name=name, data=rows[start:start + INSERT_BATCH_SIZE], partition_name=partition_name)
+        logger.info(f"Inserted {len(rows)} records into '{name}', partition '{partition_name}'.")
+
+        total += len(rows)
+        probe = probe or rows[0]
+    return total, probe
+
+
+def build_index(client, name, metric_type, index=None):
+    """Seals the loaded data, builds the vector index once, and loads the collection for search."""
+    client.flush(collection_name=name)
+    index_type = index.index_type if index else "AUTOINDEX"
+    params = {}
+    if index_type.startswith("IVF"):
+        params["nlist"] = index.nlist
+    if index_type == "IVF_PQ":
+        params.update(m=index.pq_subspaces, nbits=PQ_BITS)
+    index_params = client.prepare_index_params()
+    index_params.add_index(field_name="vector", index_type=index_type, metric_type=metric_type, params=params)
+    client.create_index(collection_name=name, index_params=index_params)
+    client.load_collection(collection_name=name)
+    logger.info(f"Index built and collection '{name}' loaded.")
+
+
+def validate(client, name, expected_rows, probe, index=None):
+    """Checks the row count and that a known record finds itself as the top hit (through re-scoring if compressed)."""
+    row_count = int(client.get_collection_stats(collection_name=name).get("row_count", 0))
+    if row_count != expected_rows:
+        logger.error(f"Validation failed for '{name}': {row_count} rows, expected {expected_rows}.")
+        return False
+
+    if index is None:
+        res = client.search(collection_name=name, data=[probe["vector"]], limit=1, output_fields=["url"])
+        top = res[0][0].get("id") if res and res[0] else None
+    else:
+        query = index.full_vector(probe["id"])
+        res = client.search(collection_name=name, data=index.project([query]), limit=index.fetch_limit(1),
+                            search_params=index.search_params(), output_fields=["url"])
+        hits = index.rescore(query, [{"id": hit.get("id")} for hit in res[0]] if res else [], 1)
+        top = hits[0]["id"] if hits else None
+    if top != probe["id"]:
+        logger.error(f"Validation failed for '{name}': probe record {probe['id']} was not its own top hit.")
+        return False
+
+    logger.info(f"Validated '{name}': {row_count} rows.")
+    return True
+
+
+def swap_alias(client, name):
+    """Points the alias at `name` in one step, so searches never see a partial index.
+
+    The previous version is released from memory afterwards and kept only as a
+    cold rollback copy; to roll back, load it and alter the alias back to it.
+    """
+    previous = live_collection(client)
+    if previous:
+        client.alter_alias(collection_name=name, alias=ALIAS)
+        client.release_collection(collection_name=previous)
+        logger.info(f"Released previous version '{previous}'.")
+    else:
+        # One-time migration: an alias can't share its name with a real collection
+        if client.has_collection(collection_name=ALIAS):
+            logger.warning(f"Dropping legacy collection '{ALIAS}' so the alias can take its name.")
+            client.drop_collection(collection_name=ALIAS)
+        client.create_alias(collection_name=name, alias=ALIAS)
+    logger.info(f"Alias '{ALIAS}' now points at '{name}'.")
+
+
+def garbage_collect(client, keep=KEEP_VERSIONS):
+    """Drops all but the newest `keep` versions, never the live one, and releases the kept ones that aren't live."""
+    live = live_collection(client)
+    versions = [version_name(version) for version in list_versions(client)]
+    cutoff = len(versions) - keep if keep else len(versions)
+    for idx, name in enumerate(versions):
+        if name == live:
+            continue
+        if idx >= cutoff:
+            # Rollback copies don't need to hold index memory until they are loaded again
+            client.release_collection(collection_name=name)
+        else:
+            client.drop_collection(collection_name=name)
+            remove_index(name)
+            logger.info(f"Dropped old version '{name}'.")
+
+
+def _discard_failed_build(client, name, swapping):
+    """Drops a build that didn't go live; returns True if it turns out to be live after all."""
+    try:
+        live = live_collection(client)
+        if live == name:
+            # The alias change was applied even though the call raised
+            logger.warning(f"Alias '{ALIAS}' points at '{name}' despite the error; keeping it.")
+            return True
+        if swapping and live is None:
+            # The legacy collection may already be gone, so this build is the only copy of the data
+            logger.error(f"Alias '{ALIAS}' is missing; kept '{name}'. Point the alias at it by hand.")
+            return False
+        if client.has_collection(collection_name=name):
+            client.drop_collection(collection_name=name)
+        remove_index(name)
+        logger.error(f"Dropped failed build '{name}'; alias '{ALIAS}' unchanged.")
+    except Exception as e:
+        logger.error(f"Could not clean up failed build '{name}', check it by hand: {e}")
+    return False
+
+
+def build_and_swap(client, json_directory, keep=KEEP_VERSIONS, index_type="AUTOINDEX", dimension=None, learned=True,
+                   candidates=RERANK_CANDIDATES):
+    """Builds the next version in the background, validates it, swaps the alias and cleans up.
+
+    With a non-default `index_type` or a reduced `dimension` the version is
+    compressed: Milvus stores projected vectors under the quantized index and
+    milvus_search re-scores each shortlist on the full vectors.
+    """
+    config = COLLECTIONS_CONFIG[ALIAS]
+    versions = list_versions(client)
+    name = version_name(versions[-1] + 1 if versions else 1)
+
+    ok = False
+    swapping = False
+    try:
+        batches = load_records(json_directory)
+        index = None
+        if batches and (index_type != "AUTOINDEX" or dimension):
+            index = compress_records(name, batches, index_type, dimension, learned, candidates)
+        create_empty_collection(client, name, index.dimension if index else config["dimension"], config["metric_type"])
+        total, probe = bulk_load(client, name, batches)
+        build_index(client, name, config["metric_type"], index)
+        if total > 0 and validate(client, name, total, probe, index):
+            swapping = True
+            swap_alias(client, name)
+            ok = True
+    except Exception as e:
+        logger.error(f"Build of '{name}' failed: {e}")
+    finally:
+        # Runs on interrupts too, so a half-built version never counts towards KEEP_VERSIONS
+        if not ok:
+            ok = _discard_failed_build(client, name, swapping)
+
+    if not ok:
+        return None
+
+    garbage_collect(client, keep)
+    return name
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a new versioned index and atomically switch search to it.")
+    parser.add_argument("--json-directory", default="../RAG/processed")
+    parser.add_argument("--keep", type=int, default=KEEP_VERSIONS, help="Versions to keep after the swap.")
+    parser.add_argument("--gc-only", action="store_true", help="Only drop old versions.")
+    parser.add_argument("--index-type", choices=INDEX_TYPES, default="AUTOINDEX",
+                        help="IVF_SQ8/IVF_PQ quantize the stored vectors; shortlists are re-scored on full vectors.")
+    parser.add_argument("--dimension", type=int, help="Reduce vectors to this many dimensions before indexing.")
+    parser.add_argument("--truncate", action="store_true", help="Truncate dimensions instead of learning PCA.")
+    parser.add_argument("--candidates", type=int, default=RERANK_CANDIDATES, help="Shortlist size re-scored on full vectors.")
+    args = parser.parse_args()
+
+    client = MilvusClient(uri=MILVUS_URI)
+    if args.gc_only:
+        garbage_collect(client, args.keep)
+    else:
+        build_and_swap(client, args.json_directory, args.keep, args.index_type, args.dimension, not args.truncate,
+                       args.candidates)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,8 +13,7 @@ MILVUS_URI = "http://localhost:19530"
 COLLECTIONS_CONFIG = {
     "Xfinity_VDB": {
         "dimension": 1024,
-        "metric_type": "COSINE",
-        "partitions": ["TV_data", "Internet_data","Mobile_data","Home_Solution_data","Home_Phone_data","MISC_data"]
+        "metric_type": "COSINE"
     }
 } # type: ignore
 
@@ -26,51 +25,21 @@ client = MilvusClient(
 def get_milvus_client():
     return client
 
-def create_collection(client: MilvusClient, name: str, dimension: int, metric_type: str) -> None:
-    """Creates a Milvus collection."""
-    try:
-        client.create_collection(
-            collection_name=name,
-            dimension=dimension,
-            metric_type=metric_type
-        )
-        logger.info(f"Collection '{name}' created successfully.")
-    except MilvusException as e:
-        if "already exists" in str(e):
-            logger.warning(f"Collection '{name}' already exists.")
-        else:
-            logger.error(f"Failed to create collection '{name}': {e}")
-            raise
-
-
-def create_partition(client: MilvusClient, collection_name: str, partition_name: str) -> None:
-    """Creates a partition within a Milvus collection."""
-    try:
-        client.create_partition(
-            collection_name=collection_name,
-            partition_name=partition_name
-        )
-        logger.info(f"Partition '{partition_name}' created in collection '{collection_name}'.")
-    except MilvusException as e:
-        if "already exists" in str(e):
-            logger.warning(f"Partition '{partition_name}' already exists in collection '{collection_name}'.")
-        else:
-            logger.error(f"Failed to create partition '{partition_name}' in collection '{collection_name}': {e}")
-            raise
-
-
 def main():
-    # Initialize Milvus client
+    """Checks the Milvus connection and reports which version the search alias points at.
+
+    Collections are no longer created here: "Xfinity_VDB" is an alias managed
+    by index_builder.py, and a real collection with that name would block it.
+    """
     client = MilvusClient(uri=MILVUS_URI)
     logger.info("Connected to Milvus.")
 
-
-    # Create collections and partitions
-    for collection, details in COLLECTIONS_CONFIG.items():
-        create_collection(client, collection, details["dimension"], details["metric_type"])
-        for partition in details["partitions"]:
-            create_partition(client, collection, partition)
+    for alias in COLLECTIONS_CONFIG:
+        try:
+            live = client.describe_alias(alias=alias).get("collection_name")
+            logger.info(f"Alias '{alias}' points at '{live}'.")
+        except MilvusException:
+            logger.warning(f"Alias '{alias}' doesn't exist yet; run index_builder.py to build the first version.")
 
 if __name__ == "__main__":
     main()
-
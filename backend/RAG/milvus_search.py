@@ -1,7 +1,12 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent))
+
 import torch
 import logging
 from transformers import AutoTokenizer, AutoModel, BertForSequenceClassification
 from pymilvus import MilvusClient
+from compression import load_index
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -9,7 +14,8 @@ logger = logging.getLogger(__name__)
 
 # Milvus Configuration
 MILVUS_URI = "http://localhost:19530"
-COLLECTION_NAME = "Xfinity_VDB"
+COLLECTION_NAME = "Xfinity_VDB"  # alias resolved by Milvus to the live Xfinity_VDB_v{n} (see index_builder.py)
+CONTEXT_PAGES = 5
 
 # Initialize Milvus client
 client = MilvusClient(uri=MILVUS_URI)
@@ -23,6 +29,9 @@ reranker_tokenizer = AutoTokenizer.from_pretrained('huawei-noah/TinyBERT_General
 reranker_model = BertForSequenceClassification.from_pretrained('cross-encoder/ms-marco-TinyBERT-L-6')
 reranker_model.eval()
 
+# (collection name, CompressedIndex or None) of the version the alias last resolved to
+_live_index = (None, None)
+
 def generate_embedding(text):
     """Generates an embedding vector for a given text using BAAI/bge-large-en-v1.5."""
     inputs = embedding_tokenizer(text, return_tensors='pt', truncation=True, max_length=512)
@@ -30,35 +39,89 @@ def generate_embedding(text):
         outputs = embedding_model(**inputs)
     return outputs.last_hidden_state.mean(dim=1).squeeze().tolist()
 
-def search_documents(question, client, collection_name=COLLECTION_NAME, limit=6):
-    """Searches for relevant documents in Milvus using embeddings and re-ranks the results."""
-    
-    query_vector = generate_embedding(question)
+def generate_embeddings(texts, batch_size=32):
+    """Generates embeddings for many texts, batch_size at a time, with padding-aware mean pooling."""
+    embeddings = []
+    for start in range(0, len(texts), batch_size):
+        inputs = embedding_tokenizer(texts[start:start + batch_size], return_tensors='pt', truncation=True,
+                                     max_length=512, padding=True)
+        with torch.no_grad():
+            outputs = embedding_model(**inputs)
+        # Average only over real tokens so results match generate_embedding on each text alone
+        mask = inputs['attention_mask'].unsqueeze(-1).to(outputs.last_hidden_state.dtype)
+        pooled = (outputs.last_hidden_state * mask).sum(dim=1) / mask.sum(dim=1)
+        embeddings.extend(pooled.tolist())
+    return embeddings
+
+def resolve_collection(client, collection_name=COLLECTION_NAME):
+    """Resolves an alias to its live collection, with that version's CompressedIndex if it was built compressed."""
+    global _live_index
+    try:
+        name = client.describe_alias(alias=collection_name).get("collection_name") or collection_name
+    except Exception:
+        name = collection_name  # a plain collection, e.g. before the first versioned build
+    if _live_index[0] != name:
+        _live_index = (name, load_index(name))
+    return _live_index
+
+def _search(query_vectors, client, collection_name, limit, with_vectors):
+    """Runs one Milvus search for all query vectors; compressed versions get an ANN shortlist re-scored on full vectors."""
+    name, index = resolve_collection(client, collection_name)
+    output_fields = ["url", "text"] + (["vector"] if with_vectors and index is None else [])
 
     # Perform the search in Milvus without specifying partitions
+    res = client.search(
+        collection_name=name,
+        data=query_vectors if index is None else index.project(query_vectors),
+        limit=limit if index is None else index.fetch_limit(limit),
+        search_params=None if index is None else index.search_params(),
+        output_fields=output_fields  # ✅ Ensure URL is retrieved
+    )
+
+    # Extract search results including URLs
+    results_list = []
+    for query_vector, hits in zip(query_vectors, res):
+        search_results = []
+        for hit in hits:
+            entity = hit.get("entity", {})
+            result = {"id": hit.get("id"), "url": entity.get("url", ""), "text": entity.get("text", "")}
+            if with_vectors and index is None:
+                result["vector"] = entity.get("vector")
+            search_results.append(result)
+
+        if index is not None:
+            search_results = index.rescore(query_vector, search_results, limit)
+            if with_vectors:
+                for result in search_results:
+                    result["vector"] = index.full_vector(result["id"]).tolist()
+        results_list.append(search_results)
+    return results_list
+
+def search_by_vectors(query_vectors, client, collection_name=COLLECTION_NAME, limit=6):
+    """Runs one multi-vector Milvus search and returns a list of url/text hit lists, one per query (None on failure)."""
     try:
-        res = client.search(
-            collection_name=collection_name,
-            data=[query_vector],
-            limit=limit,
-            output_fields=["url", "text"]  # ✅ Ensure URL is retrieved
-        )
+        return _search(query_vectors, client, collection_name, limit, with_vectors=False)
+    except Exception as e:
+        logger.error(f"Milvus batch search failed: {e}")
+        return None
 
+def search_by_vector(query_vector, client, collection_name=COLLECTION_NAME, limit=6, with_vectors=False):
+    """Runs the Milvus vector search and returns the hits as url/text (and optionally vector) dicts."""
+    try:
+        return _search([query_vector], client, collection_name, limit, with_vectors)[0]
     except Exception as e:
         logger.error(f"Milvus search failed: {e}")
-        return [], []
+        return []
 
-    # Extract search results including URLs
-    search_results = []
-    for hit in res[0]:  
-        search_results.append({
-            "url": hit.get("entity", {}).get("url", ""),
-            "text": hit.get("entity", {}).get("text", "")
-        })
+def search_documents(question, client, collection_name=COLLECTION_NAME, limit=6):
+    """Searches for relevant documents in Milvus using embeddings and re-ranks the results."""
+    
+    query_vector = generate_embedding(question)
+    search_results = search_by_vector(query_vector, client, collection_name, limit)
 
     if not search_results:
         logger.warning("No relevant documents found.")
-        return [], []
+        return []
 
     # Re-rank results
     reranked_results = rerank_results(question, search_results)
@@ -84,12 +147,54 @@ def rerank_results(question, search_results):
     
     return [item[1] for item in sorted_results]
 
-def search_documents_with_links(query):
+def rerank_results_batch(questions, search_results_list, batch_size=64):
+    """Re-ranks the results of many questions with batched TinyBERT forward passes."""
+    pairs = [(q_idx, question, result) for q_idx, (question, results) in enumerate(zip(questions, search_results_list))
+             for result in results]
+    scores = []
+    for start in range(0, len(pairs), batch_size):
+        batch = pairs[start:start + batch_size]
+        inputs = reranker_tokenizer([p[1] for p in batch], [p[2]["text"] for p in batch], return_tensors='pt',
+                                    truncation=True, max_length=512, padding=True)
+        with torch.no_grad():
+            logits = reranker_model(**inputs).logits
+        scores.extend(logits[:, 0].tolist() if logits.dim() > 1 else logits.tolist())
+
+    reranked = [[] for _ in questions]
+    for score, (q_idx, _, result) in zip(scores, pairs):
+        reranked[q_idx].append((score, result))
+    return [[item[1] for item in sorted(items, key=lambda x: x[0], reverse=True)] for items in reranked]
+
+def search_documents_batch(questions, client, collection_name=COLLECTION_NAME, limit=6):
+    """Batched search_documents: one embedding pass, one multi-vector search and one rerank pass for all questions.
+
+    Returns None if the Milvus search failed, so callers can tell a failure from an empty result.
+    """
+    query_vectors = generate_embeddings(questions)
+    search_results_list = search_by_vectors(query_vectors, client, collection_name, limit)
+    if search_results_list is None:
+        return None
+    return rerank_results_batch(questions, search_results_list)
+
+def drop_cached_pages(results, exclude_urls, max_pages=CONTEXT_PAGES):
+    """Keeps the top `max_pages` results minus pages already in the cached prompt prefix.
+
+    Their slots are not backfilled: those pages move from the per-request
+    context into the cached prefix, so the uncached tail only gets shorter.
+    """
+    return [r for r in results[:max_pages] if r["url"] not in exclude_urls]
+
+def search_documents_with_links(query, exclude_urls=()):
+    """Formats the top reranked results as context, skipping pages already in the prompt (e.g. cached overviews)."""
     results = search_documents(query, client)
+    return format_context(drop_cached_pages(results, exclude_urls))
+
+def format_context(results, max_pages=CONTEXT_PAGES):
+    """Formats results as numbered <webpage> blocks for the prompt."""
     context = ""
 
     # Print the top reranked results
-    for idx, result in enumerate(results[:5]):
+    for idx, result in enumerate(results[:max_pages]):
         context += f"<webpage {idx+1}>\n"
         context += f"link: {result['url']}\n\n webpage_content:\n {result['text']}\n"
         context += f"</webpage {idx+1}>\n\n\n\n\n"
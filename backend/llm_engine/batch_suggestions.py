@@ -0,0 +1,258 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import os
+import re
+import json
+import time
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from RAG.milvus_search import client as milvus_client, search_documents_batch, drop_cached_pages, format_context
+from suggestions import OVERVIEW_URLS, client, suggestion_params, extract_response_text, get_suggestions
+
+logger = logging.getLogger(__name__)
+
+# Questions retrieved together (one embedding pass, one multi-vector search, one rerank pass)
+BATCH_SIZE = 64
+# Claude requests in flight at once on the synchronous path
+BATCH_CONCURRENCY = 8
+# Message Batches API settings
+BATCH_API_SIZE = 1000
+BATCH_API_POLL_INTERVAL = 30  # seconds
+
+QUESTION_FIELDS = ["question", "query", "title", "body"]
+
+
+def _sanitize_id(value):
+    # Batch API custom_ids must match ^[a-zA-Z0-9_-]{1,64}$
+    return re.sub(r"[^a-zA-Z0-9_-]", "_", str(value))[:64]
+
+
+def _unique_id(base, seen):
+    # Suffix clashes deterministically (same file -> same ids) so resumes still line up
+    candidate = base
+    n = 2
+    while candidate in seen:
+        suffix = f"-{n}"
+        candidate = f"{base[:64 - len(suffix)]}{suffix}"
+        n += 1
+    if candidate != base:
+        logger.warning(f"Duplicate question id '{base}' renamed to '{candidate}'.")
+    seen.add(candidate)
+    return candidate
+
+
+def normalize_questions(items):
+    """Turns strings or dicts into [{"id", "question"}] with unique ids, numbering any question without one."""
+    questions = []
+    seen = set()
+    for idx, item in enumerate(items):
+        if isinstance(item, str):
+            item = {"question": item}
+        if not isinstance(item, dict):
+            continue
+        text = next((item[key] for key in QUESTION_FIELDS if item.get(key)), "")
+        if text:
+            base = _sanitize_id(item.get("id") or item.get("request_id") or f"q{idx}")
+            questions.append({"id": _unique_id(base, seen), "question": text})
+    return questions
+
+
+def load_questions(file_path):
+    """Loads questions from a JSONL file or a plain text file with one question per line."""
+    items = []
+    with open(file_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                items.append(json.loads(line) if line.startswith("{") else line)
+    return normalize_questions(items)
+
+
+def load_completed_ids(output_path):
+    """Ids that already have a successful result in the output file."""
+    completed = set()
+    if os.path.exists(output_path):
+        with open(output_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # partially written line from an interrupted run
+                if "error" not in record:
+                    completed.add(record["id"])
+    return completed
+
+
+def retrieve_contexts(questions):
+    """Retrieves and formats the context for many questions in bulk; None marks a failed retrieval."""
+    results_list = search_documents_batch(questions, milvus_client)
+    if results_list is None:
+        return [None] * len(questions)
+    contexts = []
+    for results in results_list:
+        # A question answered entirely by the cached overviews still has a (short) context
+        contexts.append(format_context(drop_cached_pages(results, OVERVIEW_URLS)) if results else None)
+    return contexts
+
+
+def _record(item, parsed_json=None, error=None):
+    record = {"id": item["id"], "question": item["question"]}
+    if parsed_json is not None:
+        record.update(parsed_json)
+    else:
+        record["error"] = error
+    return record
+
+
+def _answer(item, context):
+    if context is None:
+        # Recorded as an error so a resumed run retries it instead of keeping a context-free answer
+        return _record(item, error="Retrieval failed or returned no documents")
+    try:
+        parsed_json, _ = get_suggestions(item["question"], context)
+    except Exception as e:
+        return _record(item, error=f"Claude request failed: {e}")
+    if parsed_json is None:
+        return _record(item, error="Failed to parse AI response")
+    return _record(item, parsed_json)
+
+
+def run_batch(questions, concurrency=BATCH_CONCURRENCY, batch_size=BATCH_SIZE):
+    """Yields one record per question as it completes, with at most `concurrency` Claude calls in flight.
+
+    The next chunk is retrieved while the current chunk's Claude calls run, so
+    there is no idle gap at chunk boundaries. Closing the generator (e.g. when
+    the HTTP client disconnects) cancels every Claude call that hasn't started.
+    """
+    chunks = [questions[start:start + batch_size] for start in range(0, len(questions), batch_size)]
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    retriever = ThreadPoolExecutor(max_workers=1)
+    answers = set()
+    next_contexts = None
+    next_idx = 0
+    try:
+        while answers or next_contexts or next_idx < len(chunks):
+            # Retrieve at most one chunk ahead of the Claude calls already queued
+            if next_contexts is None and next_idx < len(chunks) and len(answers) <= batch_size:
+                next_contexts = retriever.submit(retrieve_contexts, [item["question"] for item in chunks[next_idx]])
+
+            done, _ = wait(answers | ({next_contexts} if next_contexts else set()), return_when=FIRST_COMPLETED)
+            if next_contexts in done:
+                answers |= {executor.submit(_answer, item, context)
+                            for item, context in zip(chunks[next_idx], next_contexts.result())}
+                next_contexts = None
+                next_idx += 1
+            for future in done:
+                if future in answers:
+                    answers.discard(future)
+                    yield future.result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        retriever.shutdown(wait=False, cancel_futures=True)
+
+
+def _load_pending(pending_path):
+    if os.path.exists(pending_path):
+        with open(pending_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def _save_pending(pending_path, pending):
+    tmp_path = pending_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(pending, f)
+    os.replace(tmp_path, pending_path)
+
+
+def run_batch_api(questions, pending_path, batch_size=BATCH_API_SIZE, poll_interval=BATCH_API_POLL_INTERVAL):
+    """Submits questions through the asynchronous Message Batches API and yields records as batches end.
+
+    Submitted batch ids are kept in `pending_path`, so an interrupted run picks
+    up the batches it already paid for instead of resubmitting them.
+    """
+    pending = _load_pending(pending_path)
+    in_flight = {qid for batch in pending.values() for qid in batch}
+    todo = [item for item in questions if item["id"] not in in_flight]
+
+    for start in range(0, len(todo), batch_size):
+        chunk = todo[start:start + batch_size]
+        contexts = retrieve_contexts([item["question"] for item in chunk])
+        retrieved = [(item, context) for item, context in zip(chunk, contexts) if context is not None]
+        for item, context in zip(chunk, contexts):
+            if context is None:
+                yield _answer(item, context)
+        if not retrieved:
+            continue
+        chunk = [item for item, _ in retrieved]
+        batch = client.messages.batches.create(requests=[
+            {"custom_id": item["id"], "params": suggestion_params(item["question"], context)}
+            for item, context in retrieved
+        ])
+        pending[batch.id] = {item["id"]: item["question"] for item in chunk}
+        _save_pending(pending_path, pending)
+        logger.info(f"Submitted batch '{batch.id}' with {len(chunk)} questions.")
+
+    for batch_id in list(pending):
+        while client.messages.batches.retrieve(batch_id).processing_status != "ended":
+            time.sleep(poll_interval)
+
+        batch_questions = pending[batch_id]
+        for entry in client.messages.batches.results(batch_id):
+            item = {"id": entry.custom_id, "question": batch_questions.get(entry.custom_id, "")}
+            if entry.result.type != "succeeded":
+                yield _record(item, error=f"Batch request {entry.result.type}")
+                continue
+            try:
+                yield _record(item, json.loads(extract_response_text(entry.result.message)))
+            except json.JSONDecodeError:
+                yield _record(item, error="Failed to parse AI response")
+
+        del pending[batch_id]
+        _save_pending(pending_path, pending)
+
+
+def run_to_file(questions_path, output_path, concurrency=BATCH_CONCURRENCY, use_batch_api=False):
+    """Answers every question in the file, appending results to `output_path`; reruns skip finished ids."""
+    questions = load_questions(questions_path)
+    completed = load_completed_ids(output_path)
+    todo = [item for item in questions if item["id"] not in completed]
+    logger.info(f"{len(questions)} questions, {len(completed)} already done, {len(todo)} to run.")
+
+    if use_batch_api:
+        records = run_batch_api(todo, output_path + ".pending")
+    else:
+        records = run_batch(todo, concurrency)
+
+    failed = 0
+    with open(output_path, "a", encoding="utf-8") as f:
+        for record in records:
+            if record["id"] in completed:
+                continue
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            if "error" in record:
+                failed += 1
+            else:
+                completed.add(record["id"])
+    logger.info(f"Done: {len(completed)} answered, {failed} failed (rerun to retry them).")
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Run a file of questions through retrieval and Claude in bulk.")
+    parser.add_argument("questions", help="JSONL (id + question/query/title/body) or plain-text file of questions.")
+    parser.add_argument("output", help="JSONL file results are appended to; rerunning resumes from it.")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY)
+    parser.add_argument("--batch-api", action="store_true", help="Submit through the asynchronous Message Batches API.")
+    args = parser.parse_args()
+
+    run_to_file(args.questions, args.output, args.concurrency, args.batch_api)
+
+
+if __name__ == "__main__":
+    main()
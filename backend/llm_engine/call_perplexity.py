@@ -6,7 +6,7 @@ from dotenv import load_dotenv
 def get_perplexity_response(query: str):
     load_dotenv()
     key = os.getenv("PERPLEXITY_API_KEY")
-    url = "https://api.perplexity.ai/chat/completions"
+    url = os.getenv("PERPLEXITY_API_URL", "https://api.perplexity.ai/chat/completions")
     
     payload = {
         "model": "sonar",
@@ -3,18 +3,18 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 
 import json
-import anthropic
-from dotenv import load_dotenv
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-from RAG.milvus_search import search_documents_with_links
 from call_perplexity import get_perplexity_response
+from suggestions import OVERVIEW_URLS, cache_usage, get_suggestions
+from session_store import SessionStore, load_session_context
+from batch_suggestions import BATCH_CONCURRENCY, normalize_questions, run_batch
 
-load_dotenv()
-client = anthropic.Anthropic()
+sessions = SessionStore()
 
-def load_context(question: str):
-    return search_documents_with_links(question)
+def load_context(question: str, session):
+    # Overview pages are already in the cached prefix, so don't repeat them
+    return load_session_context(session, question, exclude_urls=OVERVIEW_URLS)
 
 app = Flask(__name__)
 CORS(app)
@@ -23,6 +23,10 @@ CORS(app)
 def hello():
     return jsonify({"message": "Hello from Xfinity AI backend!"}), 200
 
+@app.route('/prompt_cache_stats', methods=['GET'])
+def prompt_cache_stats():
+    return jsonify(cache_usage.stats()), 200
+
 @app.route('/get_alternatives', methods=['POST'])
 def get_alternatives():
     data = request.json
@@ -69,53 +73,54 @@ def get_product_suggestions():
     # })
     # ################### REMOVE ###################
     
-    context = load_context(question)
+    session = sessions.get_or_create(data.get("session_id"))
+    
+    # Turns within one session run one at a time so their context stays consistent
+    with session.lock:
+        context, retrieval = load_context(question, session)
+        parsed_json, response_text = get_suggestions(question, context, session.history_messages())
+        
+        if parsed_json is None:
+            return jsonify({"error": "Failed to parse AI response", "session_id": session.session_id}), 500
+        
+        # Keep the raw JSON reply so history matches the output schema Claude must follow
+        session.commit_turn(question, response_text, retrieval)
+    
+    parsed_json["session_id"] = session.session_id
+    return jsonify(parsed_json)
+
+@app.route('/batch_product_suggestions', methods=['POST'])
+def batch_product_suggestions():
+    data = request.json
+    raw_questions = data.get("questions", [])
     
-    message = client.messages.create(
-        model="claude-3-7-sonnet-20250219",
-        max_tokens=1000,
-        temperature=0.5,
-        system="""
-You are an AI assistant from Xfinity designed to suggest products and services based on user preferences and cost-effectiveness. 
-Use the information provided in <context> tags as your primary source of truth. 
-FYI you will be given scraped webpages with links.
-You must:
-• Prioritize cost-effective options meeting the user's stated needs
-• Remain creative, helpful, and friendly
-• Avoid speculation beyond what the context supports
-• If unsure or lacking data, ask questions or clarify rather than guess
-""",
-        messages=[
-            {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "text",
-                        "text": f"""
-You're a Product Insights AI from Xfinity.
-Answer this question and output in JSON format with “ai_salesman_response” (product suggestion text), and “product_items” (list of dicts“product_name” and “product_link”).
-If user asks generic (hi, hello, or any other introductory sentences) questions, return your response in “ai_salesman_response” but keep “product_items” empty.
-<question>
-{question}
-</question>
-                        
-<context>
-{context}
-</context>
-"""
-                    }
-                ]
-            }
-        ]
-    )
+    if not isinstance(raw_questions, list):
+        return jsonify({"error": "'questions' must be a list"}), 400
     
-    response_text = message.content[0].text.strip().strip("```json").strip("```")
+    questions = normalize_questions(raw_questions)
+    
+    if not questions:
+        return jsonify({"error": "Missing 'questions' in request body"}), 400
     
     try:
-        parsed_json = json.loads(response_text)
-        return jsonify(parsed_json)
-    except json.JSONDecodeError:
-        return jsonify({"error": "Failed to parse AI response"}), 500
+        concurrency = int(data.get("concurrency", BATCH_CONCURRENCY))
+    except (TypeError, ValueError):
+        return jsonify({"error": "'concurrency' must be an integer"}), 400
+    
+    # Callers may lower concurrency but never raise it past the server's limit
+    concurrency = min(max(concurrency, 1), BATCH_CONCURRENCY)
+    
+    # Stream one JSON line per question as it completes; re-send the missing ids to resume
+    def generate():
+        records = run_batch(questions, concurrency=concurrency)
+        try:
+            for record in records:
+                yield json.dumps(record) + "\n"
+        finally:
+            # Runs when the client disconnects, so queued Claude calls are cancelled instead of billed
+            records.close()
+    
+    return Response(generate(), mimetype="application/x-ndjson")
 
 if __name__ == '__main__':
     app.run(host="0.0.0.0", port=8080, debug=True)
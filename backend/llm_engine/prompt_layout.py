@@ -0,0 +1,127 @@
+import os
+import json
+import logging
+import threading
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+PROCESSED_DIR = Path(__file__).resolve().parent.parent / "RAG" / "processed"
+
+# Category overview pages that are retrieved for most questions; they go into
+# the cached prompt prefix instead of the per-request context
+OVERVIEW_URLS = [
+    "https://www.xfinity.com/learn/digital-cable-tv",
+    "https://www.xfinity.com/learn/internet-service",
+    "https://www.xfinity.com/learn/mobile",
+    "https://www.xfinity.com/learn/home-solutions",
+    "https://www.xfinity.com/learn/home-phone-services",
+]
+
+SYSTEM_PROMPT = """
+You are an AI assistant from Xfinity designed to suggest products and services based on user preferences and cost-effectiveness.
+Use the information provided in <context> tags as your primary source of truth.
+FYI you will be given scraped webpages with links.
+You must:
+• Prioritize cost-effective options meeting the user's stated needs
+• Remain creative, helpful, and friendly
+• Avoid speculation beyond what the context supports
+• If unsure or lacking data, ask questions or clarify rather than guess
+"""
+
+OUTPUT_INSTRUCTIONS = """
+You're a Product Insights AI from Xfinity.
+Answer the question in <question> tags and output in JSON format with “ai_salesman_response” (product suggestion text), and “product_items” (list of dicts“product_name” and “product_link”).
+If user asks generic (hi, hello, or any other introductory sentences) questions, return your response in “ai_salesman_response” but keep “product_items” empty.
+The <category_overviews> below are part of your context alongside the per-question <context>.
+"""
+
+
+def load_category_overviews(processed_dir=PROCESSED_DIR, overview_urls=OVERVIEW_URLS):
+    """Loads the overview pages from the processed JSON, in a fixed order so the prefix stays byte-identical."""
+    pages = {}
+    for file_name in sorted(os.listdir(processed_dir)):
+        if file_name.endswith(".json"):
+            with open(processed_dir / file_name, "r", encoding="utf-8") as f:
+                for obj in json.load(f):
+                    if obj["url"] in overview_urls:
+                        pages[obj["url"]] = obj["text"]
+
+    missing = [url for url in overview_urls if url not in pages]
+    if missing:
+        logger.warning(f"Overview pages missing from processed data: {missing}")
+    return [(url, pages[url]) for url in overview_urls if url in pages]
+
+
+def build_system_blocks(overviews):
+    """Builds the stable system prefix; the cache breakpoint sits after the overviews."""
+    overview_text = "<category_overviews>\n"
+    for idx, (url, text) in enumerate(overviews):
+        overview_text += f"<overview {idx+1}>\nlink: {url}\n\n webpage_content:\n {text}\n</overview {idx+1}>\n\n"
+    overview_text += "</category_overviews>"
+
+    return [
+        {"type": "text", "text": SYSTEM_PROMPT},
+        {"type": "text", "text": OUTPUT_INSTRUCTIONS},
+        {"type": "text", "text": overview_text, "cache_control": {"type": "ephemeral"}},
+    ]
+
+
+def build_user_content(question, context):
+    """Builds the per-request part of the prompt: the question and the remaining retrieved context."""
+    return [
+        {
+            "type": "text",
+            "text": f"""
+<question>
+{question}
+</question>
+
+<context>
+{context}
+</context>
+"""
+        }
+    ]
+
+
+class CacheUsageTracker:
+    """Accumulates cached vs uncached input tokens across calls."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.uncached_input_tokens = 0
+        self.cache_write_tokens = 0
+        self.cache_read_tokens = 0
+        self.output_tokens = 0
+
+    def record(self, usage):
+        """Records one response's usage and returns the per-call breakdown."""
+        call = {
+            "uncached_input_tokens": usage.input_tokens,
+            "cache_write_tokens": getattr(usage, "cache_creation_input_tokens", None) or 0,
+            "cache_read_tokens": getattr(usage, "cache_read_input_tokens", None) or 0,
+            "output_tokens": usage.output_tokens,
+        }
+        with self.lock:
+            self.calls += 1
+            self.uncached_input_tokens += call["uncached_input_tokens"]
+            self.cache_write_tokens += call["cache_write_tokens"]
+            self.cache_read_tokens += call["cache_read_tokens"]
+            self.output_tokens += call["output_tokens"]
+        logger.info(f"Prompt tokens: {call['cache_read_tokens']} cached, {call['cache_write_tokens']} written to cache, "
+                    f"{call['uncached_input_tokens']} uncached.")
+        return call
+
+    def stats(self):
+        with self.lock:
+            total_input = self.uncached_input_tokens + self.cache_write_tokens + self.cache_read_tokens
+            return {
+                "calls": self.calls,
+                "uncached_input_tokens": self.uncached_input_tokens,
+                "cache_write_tokens": self.cache_write_tokens,
+                "cache_read_tokens": self.cache_read_tokens,
+                "output_tokens": self.output_tokens,
+                "cache_hit_ratio": self.cache_read_tokens / total_input if total_input else 0.0,
+            }
@@ -0,0 +1,154 @@
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from RAG.milvus_search import (client as milvus_client, generate_embeddings, search_by_vector, rerank_results,
+                               drop_cached_pages, format_context)
+
+logger = logging.getLogger(__name__)
+
+# Session store limits
+MAX_SESSIONS = 500
+SESSION_IDLE_TTL = 30 * 60  # seconds
+MAX_SESSION_CHUNKS = 16
+MAX_SESSION_TURNS = 6
+
+# A follow-up whose own embedding is at least this close to the previous
+# question's reuses the session's chunks without touching Milvus or the
+# reranker. Mean-pooled bge-large vectors have a high cosine baseline even
+# for unrelated questions, so this is set high enough that only
+# near-paraphrases should reuse. It is a starting point, not a measured
+# value: every turn logs its similarity so it can be tuned from real traffic.
+REUSE_SIMILARITY = 0.92
+SEARCH_LIMIT = 6
+CONTEXT_PAGES = 5
+
+
+def _cosine(a, b):
+    return float(a @ b / max(np.linalg.norm(a) * np.linalg.norm(b), 1e-12))
+
+
+class Session:
+    """One conversation: previous turns plus the chunks retrieved for them."""
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.lock = threading.Lock()
+        self.turns = []
+        self.chunks = OrderedDict()  # url -> {"url", "text", "vector"}, oldest first
+        self.last_question_vector = None
+        self.last_access = time.monotonic()
+
+    def commit_turn(self, question, answer, retrieval):
+        """Records a successfully answered turn along with the retrieval state prepared for it."""
+        self.turns.append((question, answer))
+        del self.turns[:-MAX_SESSION_TURNS]
+        self.add_chunks(retrieval["new_results"])
+        self.last_question_vector = retrieval["question_vector"]
+
+    def add_chunks(self, results):
+        for result in results:
+            self.chunks.pop(result["url"], None)
+            self.chunks[result["url"]] = result
+        while len(self.chunks) > MAX_SESSION_CHUNKS:
+            self.chunks.popitem(last=False)
+
+    def history_messages(self):
+        """Previous turns as alternating user/assistant messages."""
+        messages = []
+        for question, answer in self.turns:
+            messages.append({"role": "user", "content": question})
+            messages.append({"role": "assistant", "content": answer})
+        return messages
+
+
+class SessionStore:
+    """Bounded in-memory session store with idle expiry and LRU eviction."""
+
+    def __init__(self, max_sessions=MAX_SESSIONS, idle_ttl=SESSION_IDLE_TTL):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.lock = threading.Lock()
+        self.sessions = OrderedDict()  # least recently used first
+
+    def _expire(self, now):
+        while self.sessions:
+            session_id, session = next(iter(self.sessions.items()))
+            if now - session.last_access < self.idle_ttl:
+                break
+            del self.sessions[session_id]
+            logger.info(f"Session '{session_id}' expired.")
+
+    def get_or_create(self, session_id=None):
+        """Returns the live session for `session_id`, or a new one if it is unknown or expired.
+
+        New sessions always get a server-generated id; a client-supplied id
+        that isn't live is never adopted, so ids can't be guessed or planted.
+        """
+        now = time.monotonic()
+        with self.lock:
+            self._expire(now)
+            session = self.sessions.get(session_id) if session_id else None
+            if session is None:
+                session = Session(uuid.uuid4().hex)
+                self.sessions[session.session_id] = session
+                if len(self.sessions) > self.max_sessions:
+                    evicted_id, _ = self.sessions.popitem(last=False)
+                    logger.info(f"Session '{evicted_id}' evicted (LRU).")
+            else:
+                self.sessions.move_to_end(session_id)
+            session.last_access = now
+            return session
+
+    def __len__(self):
+        return len(self.sessions)
+
+
+def load_session_context(session, question, exclude_urls=()):
+    """Builds the prompt context for a turn, retrieving only what the session doesn't already hold.
+
+    Returns (context, retrieval). The session itself is left untouched; pass
+    `retrieval` to Session.commit_turn once the turn has been answered.
+
+    Follow-ups are searched with the previous question prepended so short
+    questions like "what about with 4 lines?" keep their topic, but the reuse
+    decision compares the new question's own embedding with the previous one.
+    """
+    search_text = f"{session.turns[-1][0]} {question}" if session.turns else question
+    texts = [question] if search_text == question else [question, search_text]
+    vectors = [np.asarray(v, dtype=np.float32) for v in generate_embeddings(texts)]
+    question_vector, search_vector = vectors[0], vectors[-1]
+
+    similarity = None
+    if session.last_question_vector is not None:
+        similarity = _cosine(question_vector, session.last_question_vector)
+    reuse = similarity is not None and bool(session.chunks) and similarity >= REUSE_SIMILARITY
+
+    new_results = []
+    max_pages = CONTEXT_PAGES
+    if not reuse:
+        hits = search_by_vector(search_vector.tolist(), milvus_client, limit=SEARCH_LIMIT, with_vectors=True)
+        delta = [h for h in hits if h["url"] not in session.chunks]
+        # Only the chunks the session hasn't seen go through the reranker
+        if delta:
+            reranked = rerank_results(search_text, delta)
+            new_results = drop_cached_pages(reranked, exclude_urls, CONTEXT_PAGES)
+            # Pages served from the cached prefix give up their slot rather than being backfilled
+            max_pages -= min(len(reranked), CONTEXT_PAGES) - len(new_results)
+        for result in new_results:
+            result["vector"] = np.asarray(result["vector"], dtype=np.float32)
+    similarity_text = "n/a" if similarity is None else f"{similarity:.3f}"
+    logger.info(f"Session '{session.session_id}': similarity {similarity_text}, "
+                f"{'reused context' if reuse else f'{len(new_results)} new chunks'}, {len(session.chunks)} held.")
+
+    # New chunks keep their reranker order; earlier ones are re-packed by similarity to this turn
+    new_urls = {r["url"] for r in new_results}
+    previous = [c for url, c in session.chunks.items() if url not in new_urls]
+    previous.sort(key=lambda c: _cosine(search_vector, c["vector"]), reverse=True)
+
+    context = format_context(new_results + previous, max_pages=max_pages)
+    return context, {"new_results": new_results, "question_vector": question_vector}
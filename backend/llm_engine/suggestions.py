@@ -0,0 +1,47 @@
+import json
+import anthropic
+from dotenv import load_dotenv
+from prompt_layout import load_category_overviews, build_system_blocks, build_user_content, CacheUsageTracker
+
+load_dotenv()
+client = anthropic.Anthropic()
+
+MODEL = "claude-3-7-sonnet-20250219"
+
+# Stable, cacheable prompt prefix: system prompt, output schema and category overviews
+CATEGORY_OVERVIEWS = load_category_overviews()
+SYSTEM_BLOCKS = build_system_blocks(CATEGORY_OVERVIEWS)
+OVERVIEW_URLS = {url for url, _ in CATEGORY_OVERVIEWS}
+cache_usage = CacheUsageTracker()
+
+
+def suggestion_params(question, context, history=()):
+    """Builds the messages.create arguments for one product-suggestion request."""
+    return {
+        "model": MODEL,
+        "max_tokens": 1000,
+        "temperature": 0.5,
+        "system": SYSTEM_BLOCKS,
+        "messages": list(history) + [
+            {
+                "role": "user",
+                "content": build_user_content(question, context)
+            }
+        ]
+    }
+
+
+def extract_response_text(message):
+    """Records the call's token usage and returns the reply with any ```json fence removed."""
+    cache_usage.record(message.usage)
+    return message.content[0].text.strip().strip("```json").strip("```")
+
+
+def get_suggestions(question, context, history=()):
+    """Asks Claude for product suggestions; returns (parsed JSON or None, raw response text)."""
+    message = client.messages.create(**suggestion_params(question, context, history))
+    response_text = extract_response_text(message)
+    try:
+        return json.loads(response_text), response_text
+    except json.JSONDecodeError:
+        return None, response_text
@@ -0,0 +1,183 @@
+import json
+import time
+import random
+import logging
+import argparse
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+BACKEND_URL = "http://localhost:8080"
+
+# Endpoint -> JSON field the question goes into
+ENDPOINTS = {
+    "/get_product_suggestions": "question",
+    "/get_alternatives": "query",
+}
+
+# Fields tried, in order, when reading a query corpus line
+QUERY_FIELDS = ["question", "query", "title", "body"]
+
+PERCENTILES = [50, 90, 95, 99]
+
+
+def load_queries(file_path, field=None):
+    """Loads queries from a JSONL file (one object per line) or a plain text file (one query per line)."""
+    queries = []
+    with open(file_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if not line.startswith("{"):
+                queries.append(line)
+                continue
+            record = json.loads(line)
+            for key in ([field] if field else QUERY_FIELDS):
+                if record.get(key):
+                    queries.append(record[key])
+                    break
+    return queries
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class LoadResult:
+    """Thread-safe collector for per-request latencies and outcomes."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.outcomes = Counter()
+        self.started = None
+        self.finished = None
+
+    def record(self, latency, outcome):
+        with self.lock:
+            self.latencies.append(latency)
+            self.outcomes[outcome] += 1
+
+    def summary(self):
+        duration = (self.finished or time.perf_counter()) - self.started
+        latencies = sorted(self.latencies)
+        total = len(latencies)
+        errors = total - self.outcomes.get(200, 0)
+        return {
+            "requests": total,
+            "duration_s": duration,
+            "throughput_rps": total / duration if duration else 0.0,
+            "error_rate": errors / total if total else 0.0,
+            "outcomes": dict(self.outcomes),
+            "latency_ms": {f"p{pct}": percentile(latencies, pct) * 1000 for pct in PERCENTILES},
+            "mean_latency_ms": sum(latencies) / total * 1000 if total else 0.0,
+        }
+
+
+def send_request(session, base_url, endpoint, query, timeout, result, arrival=None):
+    """Sends one request and records its latency and status (or exception name).
+
+    Latency is measured from `arrival` when given, so time spent queued behind
+    saturated workers counts against the request.
+    """
+    start = arrival if arrival is not None else time.perf_counter()
+    try:
+        response = session.post(f"{base_url}{endpoint}", json={ENDPOINTS[endpoint]: query}, timeout=timeout)
+        outcome = response.status_code
+        # The backend relays provider failures as a 200 with an "error" field
+        if outcome == 200 and "error" in response.json():
+            outcome = "upstream_error"
+    except ValueError:
+        outcome = "invalid_json"
+    except requests.exceptions.RequestException as e:
+        outcome = type(e).__name__
+    result.record(time.perf_counter() - start, outcome)
+
+
+def run_load(queries, base_url=BACKEND_URL, endpoint="/get_product_suggestions", concurrency=8,
+             rate=0.0, total_requests=None, timeout=60):
+    """Replays queries against the backend.
+
+    With `rate` > 0 requests arrive open-loop as a Poisson process at `rate`
+    requests/second (at most `concurrency` in flight, the rest queue); with
+    `rate` == 0 each of the `concurrency` workers fires its next request as
+    soon as the previous one returns.
+    """
+    total_requests = total_requests or len(queries)
+    result = LoadResult()
+    local = threading.local()
+
+    def session():
+        # requests.Session is not thread-safe, so each worker keeps its own
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        return local.session
+
+    def task(query, arrival):
+        send_request(session(), base_url, endpoint, query, timeout, result, arrival)
+
+    result.started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        next_arrival = time.perf_counter()
+        for i in range(total_requests):
+            arrival = None
+            if rate > 0:
+                next_arrival += random.expovariate(rate)
+                time.sleep(max(next_arrival - time.perf_counter(), 0))
+                arrival = next_arrival
+            executor.submit(task, queries[i % len(queries)], arrival)
+    result.finished = time.perf_counter()
+    return result.summary()
+
+
+def print_summary(summary, label=""):
+    """Prints throughput, latency percentiles and error breakdown."""
+    latency = "  ".join(f"{name}={value:.0f}ms" for name, value in summary["latency_ms"].items())
+    print(f"{label}{summary['requests']} requests in {summary['duration_s']:.1f}s | "
+          f"{summary['throughput_rps']:.2f} req/s | mean={summary['mean_latency_ms']:.0f}ms  {latency} | "
+          f"errors={summary['error_rate'] * 100:.1f}% {summary['outcomes']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a query corpus against the Flask backend.")
+    parser.add_argument("corpus", help="JSONL or plain-text file of queries.")
+    parser.add_argument("--field", help="JSON field holding the query (default: first of question/query/title/body).")
+    parser.add_argument("--url", default=BACKEND_URL)
+    parser.add_argument("--endpoint", choices=list(ENDPOINTS), default="/get_product_suggestions")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[8],
+                        help="One or more concurrency levels; several levels run as a sweep.")
+    parser.add_argument("--rate", type=float, default=0.0, help="Arrival rate in requests/second (0 = closed loop).")
+    parser.add_argument("--requests", type=int, help="Requests per run (default: size of the corpus).")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--output", help="Append each run's summary to this JSONL file.")
+    args = parser.parse_args()
+
+    queries = load_queries(args.corpus, args.field)
+    if not queries:
+        logger.error(f"No queries found in '{args.corpus}'.")
+        return
+    logger.info(f"Loaded {len(queries)} queries from '{args.corpus}'.")
+
+    # Sweep concurrency: throughput that stops rising while p99 climbs marks saturation
+    for concurrency in args.concurrency:
+        summary = run_load(queries, args.url, args.endpoint, concurrency, args.rate, args.requests, args.timeout)
+        summary.update(concurrency=concurrency, rate=args.rate, endpoint=args.endpoint)
+        print_summary(summary, label=f"[c={concurrency}] ")
+        if args.output:
+            with open(args.output, "a", encoding="utf-8") as f:
+                f.write(json.dumps(summary) + "\n")
+
+
+if __name__ == "__main__":
+    main()
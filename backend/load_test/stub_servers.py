@@ -0,0 +1,232 @@
+import json
+import time
+import random
+import logging
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+STUB_HOST = "127.0.0.1"
+
+# Default port, latency (ms) and error rate per stubbed provider
+PROVIDERS = {
+    "anthropic": {"port": 9101, "latency_ms": 1500, "jitter_ms": 400, "error_rate": 0.0},
+    "perplexity": {"port": 9102, "latency_ms": 1200, "jitter_ms": 300, "error_rate": 0.0},
+    "serp": {"port": 9103, "latency_ms": 400, "jitter_ms": 100, "error_rate": 0.0},
+    "firecrawl": {"port": 9104, "latency_ms": 900, "jitter_ms": 300, "error_rate": 0.0},
+}
+
+# Environment variables that point the backend at each stub
+PROVIDER_ENV = {
+    "anthropic": ("ANTHROPIC_BASE_URL", ""),
+    "perplexity": ("PERPLEXITY_API_URL", "/chat/completions"),
+    "serp": ("SERP_API_URL", ""),
+    "firecrawl": ("FIRECRAWL_API_URL", ""),
+}
+
+SUGGESTION_TEXT = json.dumps({
+    "ai_salesman_response": "Stubbed suggestion: Xfinity Mobile Unlimited fits your needs at the lowest cost.",
+    "product_items": [
+        {"product_name": "Xfinity Mobile Unlimited", "product_link": "https://www.xfinity.com/mobile/plan"}
+    ]
+})
+
+ALTERNATIVES_TEXT = "## Alternatives\n\n1. **Stub Provider**\n   - **Price**: $40/month\n\n## Xfinity Advantage\n- Stubbed comparison."
+
+SCRAPED_MARKDOWN = "# Stubbed page\n\nPlan details, pricing and fine print for load testing."
+
+# Simulated prompt cache: a prefix is cached for CACHE_TTL after each use, like Anthropic's ephemeral cache
+CACHE_TTL = 300  # seconds
+CACHE_MIN_TOKENS = 1024
+_prompt_cache = {}
+_prompt_cache_lock = threading.Lock()
+
+
+def _estimate_tokens(value):
+    # Roughly 4 characters per token
+    return len(json.dumps(value)) // 4
+
+
+def anthropic_usage(body):
+    """Token usage as the real API reports it, including prompt caching.
+
+    The system prefix up to the last cache_control breakpoint is written to the
+    cache on first use and read from it on repeats within CACHE_TTL.
+    """
+    system = body.get("system") or []
+    if isinstance(system, str):
+        system = [{"type": "text", "text": system}]
+    breakpoints = [idx for idx, block in enumerate(system) if block.get("cache_control")]
+    prefix = system[:breakpoints[-1] + 1] if breakpoints else []
+
+    usage = {
+        "input_tokens": _estimate_tokens(system[len(prefix):]) + _estimate_tokens(body.get("messages", [])),
+        "output_tokens": 150,
+        "cache_creation_input_tokens": 0,
+        "cache_read_input_tokens": 0,
+    }
+    prefix_tokens = _estimate_tokens(prefix) if prefix else 0
+    if prefix_tokens < CACHE_MIN_TOKENS:
+        usage["input_tokens"] += prefix_tokens
+        return usage
+
+    key = json.dumps(prefix, sort_keys=True)
+    now = time.monotonic()
+    with _prompt_cache_lock:
+        last_used = _prompt_cache.get(key)
+        _prompt_cache[key] = now
+    cached = last_used is not None and now - last_used < CACHE_TTL
+    usage["cache_read_input_tokens" if cached else "cache_creation_input_tokens"] = prefix_tokens
+    return usage
+
+
+def anthropic_response(body):
+    return {
+        "id": "msg_stub",
+        "type": "message",
+        "role": "assistant",
+        "model": body.get("model", "stub"),
+        "content": [{"type": "text", "text": SUGGESTION_TEXT}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": anthropic_usage(body),
+    }
+
+
+def perplexity_response(body):
+    return {
+        "id": "stub",
+        "model": body.get("model", "sonar"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": ALTERNATIVES_TEXT}}],
+    }
+
+
+def serp_response(query):
+    slug = query.get("q", ["stub"])[0].replace(" ", "+")
+    return {"organic": [{"link": f"https://example.com/{slug}/{rank}"} for rank in range(1, 11)]}
+
+
+def firecrawl_response(body):
+    return {"success": True, "data": {"markdown": SCRAPED_MARKDOWN, "metadata": {"url": body.get("url", "")}}}
+
+
+def make_handler(provider, settings):
+    """Builds a request handler that answers like `provider` after a simulated delay."""
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self, status, payload):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _simulate(self):
+            delay = random.gauss(settings["latency_ms"], settings["jitter_ms"])
+            time.sleep(max(delay, 0) / 1000)
+            if random.random() < settings["error_rate"]:
+                # 529 is Anthropic's "overloaded"; the others get a generic 503
+                status = 529 if provider == "anthropic" else 503
+                self._reply(status, {"error": {"type": "overloaded_error", "message": "Stubbed failure"}})
+                return False
+            return True
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if not self._simulate():
+                return
+
+            if provider == "anthropic":
+                self._reply(200, anthropic_response(body))
+            elif provider == "perplexity":
+                self._reply(200, perplexity_response(body))
+            elif provider == "firecrawl":
+                self._reply(200, firecrawl_response(body))
+            else:
+                self._reply(404, {"error": "Not found"})
+
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            if provider != "serp" or parsed.path != "/search":
+                self._reply(404, {"error": "Not found"})
+                return
+            if self._simulate():
+                self._reply(200, serp_response(parse_qs(parsed.query)))
+
+    return StubHandler
+
+
+def start_stub_servers(providers=PROVIDERS, host=STUB_HOST):
+    """Starts one threaded HTTP server per provider in the background and returns them."""
+    servers = []
+    for provider, settings in providers.items():
+        server = ThreadingHTTPServer((host, settings["port"]), make_handler(provider, settings))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        logger.info(f"Stub '{provider}' listening on http://{host}:{settings['port']} "
+                    f"(latency {settings['latency_ms']}±{settings['jitter_ms']}ms, error rate {settings['error_rate']}).")
+        servers.append(server)
+    return servers
+
+
+def stub_environment(providers=PROVIDERS, host=STUB_HOST):
+    """Returns the environment variables that route the backend to the stubs."""
+    env = {"ANTHROPIC_API_KEY": "stub", "PERPLEXITY_API_KEY": "stub", "FIRECRAWL_API_KEY": "stub"}
+    for provider, (variable, path) in PROVIDER_ENV.items():
+        if provider in providers:
+            env[variable] = f"http://{host}:{providers[provider]['port']}{path}"
+    return env
+
+
+def _parse_overrides(values, cast):
+    overrides = {}
+    for value in values or []:
+        provider, _, setting = value.partition("=")
+        if provider not in PROVIDERS:
+            raise argparse.ArgumentTypeError(f"Unknown provider '{provider}'.")
+        overrides[provider] = cast(setting)
+    return overrides
+
+
+def _parse_latency(setting):
+    mean, _, jitter = setting.partition(":")
+    return float(mean), float(jitter or 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run local stand-ins for Anthropic, Perplexity, SERP and Firecrawl.")
+    parser.add_argument("--latency", action="append", metavar="PROVIDER=MEAN_MS[:JITTER_MS]",
+                        help="Override a provider's latency distribution (repeatable).")
+    parser.add_argument("--error-rate", action="append", metavar="PROVIDER=RATE",
+                        help="Override a provider's error rate between 0 and 1 (repeatable).")
+    args = parser.parse_args()
+
+    providers = {name: dict(settings) for name, settings in PROVIDERS.items()}
+    for provider, (mean, jitter) in _parse_overrides(args.latency, _parse_latency).items():
+        providers[provider].update(latency_ms=mean, jitter_ms=jitter)
+    for provider, rate in _parse_overrides(args.error_rate, float).items():
+        providers[provider]["error_rate"] = rate
+
+    start_stub_servers(providers)
+    print("\nStart the backend with:")
+    for variable, value in stub_environment(providers).items():
+        print(f"export {variable}=\"{value}\"")
+
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        logger.info("Stopping stub servers.")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,7 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-app = FirecrawlApp(api_key=os.getenv("FIRECRAWL_API_KEY"))
+app = FirecrawlApp(api_key=os.getenv("FIRECRAWL_API_KEY"), api_url=os.getenv("FIRECRAWL_API_URL", "https://api.firecrawl.dev"))
 
 def return_markdown(url: str):
     response = app.scrape_url(url=url, params={'formats': [ 'markdown' ],})
@@ -1,8 +1,16 @@
 import sys
 import ssl
 import json
+import os
 
 def search(query: str):
+    # Point at a local SERP stub (load testing) instead of the proxied Google search
+    stub_url = os.getenv("SERP_API_URL")
+    if stub_url:
+        import urllib.request
+        results = urllib.request.urlopen(f"{stub_url}/search?q={query}&num=10&gl=us&brd_json=1").read()
+        return json.loads(results.decode('utf-8'))
+
     ssl._create_default_https_context = ssl._create_unverified_context
     if sys.version_info[0]==2:
         import six
@@ -27,6 +27,7 @@ const SmartSearch = ({ onLoadChat }) => {
   const [currentMessage, setCurrentMessage] = useState('');
   const [charIndex, setCharIndex] = useState(0);
   const [chatId, setChatId] = useState(() => Date.now().toString());
+  const [sessionId, setSessionId] = useState(null); // issued by the backend on the first reply
 
   const chatMainRef = useRef(null);
   const API_BASE_URL = 'http://18.217.74.171:8080/get_product_suggestions';
@@ -50,6 +51,7 @@ const SmartSearch = ({ onLoadChat }) => {
         id: chatId,
         title: chatTitle,
         messages: messages,
+        sessionId: sessionId,
         timestamp: new Date().toISOString()
       };
       
@@ -64,7 +66,7 @@ const SmartSearch = ({ onLoadChat }) => {
       const limitedChats = existingChats.slice(0, 10);
       localStorage.setItem('chatHistory', JSON.stringify(limitedChats));
     }
-  }, [messages, chatId]);
+  }, [messages, chatId, sessionId]);
 
   const loadChatFromHistory = (historyChatId) => {
     const existingChatsJSON = localStorage.getItem('chatHistory');
@@ -75,6 +77,7 @@ const SmartSearch = ({ onLoadChat }) => {
       if (chatToLoad) {
         setMessages(chatToLoad.messages);
         setChatId(chatToLoad.id);
+        setSessionId(chatToLoad.sessionId || null);
         
         const lastBotMessage = [...chatToLoad.messages]
           .reverse()
@@ -100,7 +103,8 @@ const SmartSearch = ({ onLoadChat }) => {
   const sendMessageToBackend = async (message) => {
     try {
       const response = await axios.post(API_BASE_URL, {
-        question: message
+        question: message,
+        ...(sessionId && { session_id: sessionId })
       });
       return response.data;
     } catch (error) {
@@ -119,6 +123,9 @@ const SmartSearch = ({ onLoadChat }) => {
 
     try {
       const data = await sendMessageToBackend(messageText);
+      if (data.session_id) {
+        setSessionId(data.session_id);
+      }
       // Expecting data:
       // { ai_salesman_response: "...", product_items: [ { product_name, product_link }, ... ] }
       
@@ -171,6 +178,7 @@ const SmartSearch = ({ onLoadChat }) => {
     setCurrentMessage('');
     setCharIndex(0);
     setChatId(Date.now().toString());
+    setSessionId(null);
     console.log('Chat refreshed');
   };
 